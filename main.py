@@ -5,33 +5,62 @@ MarketPulse Pro - Main Entry Point
 
 import asyncio
 import logging
-from pathlib import Path
+import signal
+
+from aiohttp import web
 
 from src.core.bot import MarketPulseBot
-from src.core.config import Config, setup_logging
+from src.core.config import config, setup_logging
+
+
+async def health(request: web.Request) -> web.Response:
+    """Liveness probe"""
+    return web.Response(text="ok")
+
+
+async def start_health_server(port: int) -> web.AppRunner:
+    """Serve /health for the platform's health check"""
+    app = web.Application()
+    app.router.add_get("/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
 
 
 async def main():
     """Main entry point for the bot"""
+    config.ensure_dirs()
     setup_logging()
     logger = logging.getLogger(__name__)
     
-    config = Config()
-    
     if not config.BOT_TOKEN or config.BOT_TOKEN == "your_bot_token_here":
         logger.error("❌ Please set BOT_TOKEN in .env file")
         return
     
     bot = MarketPulseBot(config)
     
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, bot.request_stop)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers; Ctrl+C still
+            # raises KeyboardInterrupt
+            break
+    
+    health_runner = None
     try:
         logger.info("🚀 Starting MarketPulse Pro Bot...")
-        Path("data").mkdir(exist_ok=True)
-        Path("logs").mkdir(exist_ok=True)
         
         await bot.start()
         logger.info("✅ Bot started successfully!")
         
+        # In webhook mode the webhook listener already holds $PORT
+        if config.IS_RENDER and not config.WEBHOOK_URL:
+            health_runner = await start_health_server(config.PORT)
+            logger.info(f"🩺 Health endpoint listening on port {config.PORT}")
+        
         await bot.run_forever()
         
     except KeyboardInterrupt:
@@ -39,8 +68,15 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Fatal error: {e}", exc_info=True)
     finally:
+        if health_runner:
+            await health_runner.cleanup()
         await bot.stop()
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
@@ -5,16 +5,15 @@ Database setup script
 
 import asyncio
 import logging
-from pathlib import Path
 from src.core.database import init_db
-from src.core.config import setup_logging
+from src.core.config import config, setup_logging
 
 async def setup_database():
+    config.ensure_dirs()
     setup_logging()
     logger = logging.getLogger(__name__)
     
     try:
-        Path("data").mkdir(exist_ok=True)
         await init_db()
         logger.info("✅ Database setup completed successfully!")
         
@@ -1,42 +1,147 @@
+import asyncio
 import logging
-from telegram.ext import Application
+from telegram import BotCommand, Update
+from telegram.ext import (
+    Application, ApplicationHandlerStop, CallbackQueryHandler, CommandHandler, ContextTypes, TypeHandler
+)
 
 from src.core.config import Config
-from src.handlers import user_handlers, admin_handlers
+from src.handlers import user_handlers, admin_handlers, callback_handlers
+from src.services.activity_service import ActivityService
+from src.services.ban_service import ban_service
+from src.services.news_service import NewsService
+from src.services.price_service import PriceService
 from src.services.scheduler import SchedulerService
 
 logger = logging.getLogger(__name__)
 
+# (command, handler, menu description); admin-only commands stay out of the menu
+COMMANDS = (
+    ("start", user_handlers.start_command, "راه‌اندازی ربات"),
+    ("help", user_handlers.help_command, "راهنمای ربات"),
+    ("prices", user_handlers.prices_command, "قیمت‌های لحظه‌ای"),
+    ("admin", admin_handlers.admin_command, None),
+    ("stats", admin_handlers.stats_command, None),
+    ("users", admin_handlers.users_command, None),
+    ("broadcast", admin_handlers.broadcast_command, None),
+    ("ban", admin_handlers.ban_command, None),
+    ("unban", admin_handlers.unban_command, None),
+    ("addchannel", admin_handlers.addchannel_command, None),
+)
+BOT_COMMANDS = [BotCommand(name, description) for name, _, description in COMMANDS if description]
+
+# Only the update types the registered handlers consume
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+# Long polling: Telegram holds getUpdates open until an update arrives
+POLL_TIMEOUT = 30
+POLL_INTERVAL = 1.0
+
+# Outgoing API calls share one HTTP connection pool (256 connections by
+# default, getUpdates has its own); wait for a free one instead of
+# failing after PTB's default 1s during bursts
+POOL_TIMEOUT = 10.0
+
 class MarketPulseBot:
     def __init__(self, config: Config):
         self.config = config
         self.app = None
         self.scheduler = None
+        self.stop_event = asyncio.Event()
     
     async def start(self):
-        self.app = Application.builder().token(self.config.BOT_TOKEN).build()
+        self.app = (
+            Application.builder()
+            .token(self.config.BOT_TOKEN)
+            .concurrent_updates(True)
+            .pool_timeout(POOL_TIMEOUT)
+            .build()
+        )
         self._setup_handlers()
         self.scheduler = SchedulerService(self.app, self.config)
         await self.scheduler.start()
         logger.info("✅ Bot initialized successfully")
     
     def _setup_handlers(self):
-        self.app.add_handler(CommandHandler("start", user_handlers.start_command))
-        self.app.add_handler(CommandHandler("help", user_handlers.help_command))
-        self.app.add_handler(CommandHandler("prices", user_handlers.prices_command))
-        self.app.add_handler(CommandHandler("admin", admin_handlers.admin_command))
-        # ... سایر هندلرها
+        # Group -1 runs before every other handler
+        self.app.add_handler(TypeHandler(Update, self._drop_banned), group=-1)
+        for name, callback, _ in COMMANDS:
+            self.app.add_handler(CommandHandler(name, callback))
+        self.app.add_handler(CallbackQueryHandler(callback_handlers.callback_handler))
+        self.app.add_error_handler(self._error_handler)
+    
+    async def _post_init(self, application: Application):
+        """Runs once after the application is initialized"""
+        # Services are created on the running loop and shared via bot_data
+        application.bot_data["price_service"] = PriceService()
+        application.bot_data["news_service"] = NewsService()
+        application.bot_data["activity_service"] = ActivityService()
+        application.bot_data["broadcast_semaphore"] = asyncio.Semaphore(self.config.BROADCAST_RATE)
+        await ban_service.load()
+        await application.bot.set_my_commands(BOT_COMMANDS)
+        await self._notify_admins("✅ ربات MarketPulse Pro راه‌اندازی شد.")
+    
+    async def _drop_banned(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Ignore every update from a banned user"""
+        user = update.effective_user
+        if user and user.id not in self.config.ADMIN_IDS and ban_service.is_banned(user.id):
+            raise ApplicationHandlerStop
+    
+    async def _error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE):
+        """Log handler errors and report them to the admins"""
+        logger.error("Error while handling an update", exc_info=context.error)
+        await self._notify_admins(f"⚠️ خطا در ربات:\n{context.error}")
+    
+    async def _notify_admins(self, text: str):
+        """Send a message to every admin concurrently"""
+        results = await asyncio.gather(
+            *(self.app.bot.send_message(chat_id=admin_id, text=text) for admin_id in self.config.ADMIN_IDS),
+            return_exceptions=True
+        )
+        for admin_id, result in zip(self.config.ADMIN_IDS, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not notify admin {admin_id}: {result}")
     
     async def run_forever(self):
         await self.app.initialize()
+        await self._post_init(self.app)
         await self.app.start()
-        await self.app.updater.start_polling()
-        while True:
-            await asyncio.sleep(3600)
+        if self.config.WEBHOOK_URL:
+            await self.app.updater.start_webhook(
+                listen="0.0.0.0",
+                port=self.config.WEBHOOK_PORT,
+                webhook_url=self.config.WEBHOOK_URL,
+                secret_token=self.config.WEBHOOK_SECRET or None,
+                allowed_updates=ALLOWED_UPDATES
+            )
+        else:
+            await self.app.updater.start_polling(
+                poll_interval=POLL_INTERVAL,
+                timeout=POLL_TIMEOUT,
+                allowed_updates=ALLOWED_UPDATES
+            )
+        await self.stop_event.wait()
+    
+    def request_stop(self):
+        """Wake run_forever so the bot can shut down"""
+        self.stop_event.set()
     
     async def stop(self):
+        # Release run_forever if stop() is reached some other way
+        self.stop_event.set()
+        if self.app:
+            if self.app.running:
+                await self._notify_admins("⏹ ربات MarketPulse Pro متوقف شد.")
+            if self.app.updater and self.app.updater.running:
+                await self.app.updater.stop()
+            if self.app.running:
+                await self.app.stop()
+        # Stopped after the app so the final activity flush sees every update
         if self.scheduler:
             await self.scheduler.stop()
         if self.app:
-            await self.app.stop()
+            for name in ("price_service", "news_service"):
+                service = self.app.bot_data.get(name)
+                if service:
+                    await service.close()
             await self.app.shutdown()
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 import logging
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,30 +12,60 @@ def setup_logging():
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler('logs/marketpulse.log'),
+            logging.FileHandler(config.LOGS_DIR / 'marketpulse.log'),
             logging.StreamHandler()
         ]
     )
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    def __init__(self):
-        self.BOT_TOKEN = os.getenv("BOT_TOKEN", "")
+    """Bot settings, read from the environment once at import"""
+    BOT_TOKEN: str
+    ADMIN_IDS: Tuple[int, ...]
+    DATABASE_URL: str
+    DB_POOL_SIZE: int
+    DB_MAX_OVERFLOW: int
+    DB_POOL_RECYCLE: int
+    IS_RENDER: bool
+    PORT: int
+    WEBHOOK_URL: str
+    WEBHOOK_PORT: int
+    WEBHOOK_SECRET: str
+    TGJU_API_URL: str = "https://api.tgju.org/v1/data/sana.json"
+    COINGECKO_API_URL: str = "https://api.coingecko.com/api/v3"
+    NEWS_RSS_FEEDS: Tuple[str, ...] = (
+        "https://www.tasnimnews.com/fa/rss/feed/0/7/اقتصادی",
+        "https://www.farsnews.ir/rss/economy"
+    )
+    REQUIRED_CHANNELS_COUNT: int = 3
+    BROADCAST_RATE: int = 30  # Telegram's global limit, messages per second
+    VIP_PRICE: int = 49000
+    FREE_TRIAL_DAYS: int = 3
+    BASE_DIR: Path = Path(__file__).parent.parent.parent
+    DATA_DIR: Path = BASE_DIR / "data"
+    LOGS_DIR: Path = BASE_DIR / "logs"
+    
+    @classmethod
+    def from_env(cls) -> "Config":
         admin_ids_str = os.getenv("ADMIN_IDS", "")
-        self.ADMIN_IDS = [int(x.strip()) for x in admin_ids_str.split(",") if x.strip()]
-        self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///data/marketpulse.db")
-        self.TGJU_API_URL = "https://api.tgju.org/v1/data/sana.json"
-        self.COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
-        self.NEWS_RSS_FEEDS = [
-            "https://www.tasnimnews.com/fa/rss/feed/0/7/اقتصادی",
-            "https://www.farsnews.ir/rss/economy"
-        ]
-        self.REQUIRED_CHANNELS_COUNT = 3
-        self.VIP_PRICE = 49000
-        self.FREE_TRIAL_DAYS = 3
-        self.BASE_DIR = Path(__file__).parent.parent.parent
-        self.DATA_DIR = self.BASE_DIR / "data"
-        self.LOGS_DIR = self.BASE_DIR / "logs"
+        return cls(
+            BOT_TOKEN=os.getenv("BOT_TOKEN", ""),
+            ADMIN_IDS=tuple(int(x.strip()) for x in admin_ids_str.split(",") if x.strip()),
+            DATABASE_URL=os.getenv("DATABASE_URL", "sqlite+aiosqlite:///data/marketpulse.db"),
+            DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", "10")),
+            DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            IS_RENDER=os.getenv("RENDER", "").lower() == "true",
+            PORT=int(os.getenv("PORT", "10000")),
+            WEBHOOK_URL=os.getenv("WEBHOOK_URL", ""),
+            # The platform only routes traffic to $PORT
+            WEBHOOK_PORT=int(os.getenv("WEBHOOK_PORT", os.getenv("PORT", "10000"))),
+            WEBHOOK_SECRET=os.getenv("WEBHOOK_SECRET", "")
+        )
+    
+    def ensure_dirs(self):
+        """Create the data and log directories; call before setup_logging"""
         self.DATA_DIR.mkdir(exist_ok=True)
         self.LOGS_DIR.mkdir(exist_ok=True)
 
-config = Config()
\ No newline at end of file
+config = Config.from_env()
\ No newline at end of file
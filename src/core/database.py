@@ -2,26 +2,72 @@
 Database setup and models
 """
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Float, Text
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, JSON, Float, Text, Index, text, func, cast, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
 from datetime import datetime
 from typing import Optional
 
 from src.core.config import config
 
-# Create async engine
-engine = create_async_engine(config.DATABASE_URL, echo=False)
+IS_SQLITE = config.DATABASE_URL.startswith("sqlite")
+
+# Create async engine with a pooled set of connections reused across handlers
+engine = create_async_engine(
+    config.DATABASE_URL,
+    echo=False,
+    connect_args={"timeout": 30} if IS_SQLITE else {},
+    query_cache_size=1200,
+    # aiosqlite defaults to NullPool; pool explicitly so connections are reused
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    # Hand out the most recently used connection so it stays warm and the
+    # rest can idle past pool_recycle
+    pool_use_lifo=True,
+    pool_pre_ping=True,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    json_serializer=lambda value: orjson.dumps(value).decode(),
+    json_deserializer=orjson.loads
+)
+
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a write is in progress"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
+def dialect_insert(table):
+    """INSERT with the engine's ON CONFLICT support (upserts)"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
 class User(Base):
     """User model"""
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of /users walks this index newest-first
+        Index("ix_users_join_date_id", "join_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(Integer, unique=True, nullable=False, index=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
     username = Column(String(100), nullable=True)
     first_name = Column(String(100))
     last_name = Column(String(100), nullable=True)
@@ -34,7 +80,7 @@ class User(Base):
     
     # Settings
     notifications_enabled = Column(Boolean, default=True)
-    favorite_symbols = Column(JSON, default=list)
+    favorite_symbols = Column(JSON().with_variant(ARRAY(String(20)), "postgresql"), default=list)
     
     # Statistics
     join_date = Column(DateTime, default=datetime.utcnow)
@@ -49,6 +95,22 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_banned = Column(Boolean, default=False)
     
+    @hybrid_property
+    def full_name(self):
+        """Display name: first + last name, falling back to username or id"""
+        if self.first_name and self.last_name:
+            return f"{self.first_name} {self.last_name}"
+        return self.first_name or self.username or str(self.telegram_id)
+    
+    @full_name.expression
+    def full_name(cls):
+        return func.coalesce(
+            cls.first_name + " " + cls.last_name,
+            cls.first_name,
+            cls.username,
+            cast(cls.telegram_id, String)
+        )
+    
     def __repr__(self):
         return f"<User {self.telegram_id} ({self.username})>"
 
@@ -56,6 +118,15 @@ class User(Base):
 class Channel(Base):
     """Channel model for required channels"""
     __tablename__ = "channels"
+    __table_args__ = (
+        # Admin channel list is ordered newest-first
+        Index("ix_channels_created_at", "created_at"),
+        # Required channels: active ones, newest first
+        # SQLite only matches a partial index whose predicate has the same
+        # form as the query's, and SQLAlchemy renders == True as "= 1" there
+        Index("ix_channels_active_created", "created_at",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
     
     id = Column(Integer, primary_key=True)
     username = Column(String(100), unique=True, nullable=False)
@@ -63,7 +134,7 @@ class Channel(Base):
     monthly_price = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    admin_id = Column(Integer, nullable=True)
+    admin_id = Column(BigInteger, nullable=True)
 
 
 async def init_db():
@@ -2,80 +2,265 @@
 Admin command handlers
 """
 
+import asyncio
 import logging
-from telegram import Update
+from datetime import datetime
+from typing import Optional, Tuple
+from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.error import Forbidden, RetryAfter, TelegramError
 from telegram.ext import ContextTypes
-from sqlalchemy import select, func
+from sqlalchemy import select, tuple_, bindparam, update as sql_update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import AsyncSessionLocal, User, Channel
+from src.core.database import AsyncSessionLocal, User
+from src.services.ban_service import ban_service
+from src.services.channel_service import channel_service
+from src.services.stats_service import stats_service
 from src.utils.decorators import require_admin
 
 logger = logging.getLogger(__name__)
 
+USERS_PAGE_SIZE = 10
+USERS_AFTER_ROUTE = "users_after"
+
+# Statements are built once at import; per-call values go in as bound parameters.
+# A page fetches one extra row to tell whether a next page exists, so the cost
+# stays bounded by the page size instead of counting the remaining users.
+_USERS_PAGE_STMT = select(
+    User.id,
+    User.telegram_id,
+    User.first_name,
+    User.is_active,
+    User.is_vip,
+    User.join_date
+).order_by(User.join_date.desc(), User.id.desc()).limit(USERS_PAGE_SIZE + 1)
+_USERS_NEXT_PAGE_STMT = _USERS_PAGE_STMT.where(
+    tuple_(User.join_date, User.id) < tuple_(
+        bindparam("after_date", type_=User.join_date.type),
+        bindparam("after_id", type_=User.id.type)
+    )
+)
+_BROADCAST_RECIPIENTS_STMT = (
+    select(User.telegram_id)
+    .where(User.is_active == True, User.is_banned == False)
+)
+_DEACTIVATE_USERS_STMT = (
+    sql_update(User)
+    .where(User.telegram_id.in_(bindparam("user_ids", expanding=True)))
+    .values(is_active=False)
+)
+
+ADMIN_TEXT = (
+    "👑 **پنل مدیریت**\n\n"
+    "🔧 **دستورات:**\n"
+    "/stats - آمار ربات\n"
+    "/users - لیست کاربران\n"
+    "/channels - لیست کانال‌ها\n"
+    "/broadcast - ارسال پیام همگانی\n"
+    "/ban - مسدود کردن کاربر\n"
+    "/unban - رفع مسدودیت کاربر\n"
+    "/addchannel - افزودن کانال اجباری\n\n"
+    "برای بازگشت به منوی اصلی /start را بزنید."
+)
+STATS_HEADER = "📊 **آمار ربات**\n\n"
+
 @require_admin
 async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /admin command"""
-    admin_text = (
-        "👑 **پنل مدیریت**\n\n"
-        "🔧 **دستورات:**\n"
-        "/stats - آمار ربات\n"
-        "/users - لیست کاربران\n"
-        "/channels - لیست کانال‌ها\n\n"
-        "برای بازگشت به منوی اصلی /start را بزنید."
-    )
-    
-    await update.message.reply_text(admin_text, parse_mode="Markdown")
+    await update.message.reply_text(ADMIN_TEXT, parse_mode="Markdown")
 
 @require_admin
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /stats command"""
-    async with AsyncSessionLocal() as session:
-        # User stats
-        total_users = await session.scalar(select(func.count(User.id)))
-        active_users = await session.scalar(
-            select(func.count(User.id)).where(User.is_active == True)
-        )
-        vip_users = await session.scalar(
-            select(func.count(User.id)).where(User.is_vip == True)
+    stats = await get_admin_stats()
+    await update.message.reply_text(stats['stats_text'], parse_mode="Markdown")
+
+async def get_admin_stats(force: bool = False) -> dict:
+    """Counts for the admin views, reused for a short while unless forced"""
+    stats = await stats_service.get_stats(force)
+    if 'stats_text' not in stats:
+        # Rendered once per refresh; cache hits share the same dict
+        now = datetime.now()
+        stats['updated_time'] = now.strftime('%H:%M:%S')
+        stats['stats_text'] = STATS_HEADER + (
+            f"👥 کاربران کل: {stats['total_users']}\n"
+            f"✅ کاربران فعال: {stats['active_users']}\n"
+            f"👑 کاربران VIP: {stats['vip_users']}\n"
+            f"🚫 کاربران مسدود: {stats['banned_users']}\n"
+            f"🆕 عضویت امروز: {stats['new_users']}\n"
+            f"📢 کانال‌ها: {stats['channel_count']}\n\n"
+            f"🕐 تاریخ: {now.strftime('%Y/%m/%d %H:%M')}"
         )
-        
-        # Channel stats
-        channel_count = await session.scalar(select(func.count(Channel.id)))
-    
-    stats_text = (
-        "📊 **آمار ربات**\n\n"
-        f"👥 کاربران کل: {total_users or 0}\n"
-        f"✅ کاربران فعال: {active_users or 0}\n"
-        f"👑 کاربران VIP: {vip_users or 0}\n"
-        f"📢 کانال‌ها: {channel_count or 0}\n\n"
-        f"🕐 تاریخ: {datetime.now().strftime('%Y/%m/%d %H:%M')}"
-    )
-    
-    await update.message.reply_text(stats_text, parse_mode="Markdown")
+    return stats
 
 @require_admin
 async def users_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /users command"""
+    message, keyboard = await render_users_page()
+    await update.message.reply_text(message, parse_mode="Markdown", reply_markup=keyboard)
+
+async def render_users_page(cursor: Optional[Tuple[datetime, int, int]] = None):
+    """Render one /users page, keyset-paginated on (join_date, id)"""
     async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).order_by(User.join_date.desc()).limit(10)
-        )
-        users = result.scalars().all()
+        if cursor is None:
+            shown = 0
+            result = await session.execute(_USERS_PAGE_STMT)
+        else:
+            after_date, after_id, shown = cursor
+            result = await session.execute(
+                _USERS_NEXT_PAGE_STMT, {"after_date": after_date, "after_id": after_id}
+            )
+        users = result.all()
     
     if not users:
-        await update.message.reply_text("👥 هیچ کاربری یافت نشد.")
-        return
+        return "👥 هیچ کاربری یافت نشد.", None
     
-    message = "👥 **آخرین کاربران**\n\n"
+    has_next = len(users) > USERS_PAGE_SIZE
+    users = users[:USERS_PAGE_SIZE]
+    # Total from the cached stats; earlier pages are counted in the cursor
+    stats = await stats_service.get_stats()
+    total = max(stats['total_users'], shown + len(users))
+    parts = [f"👥 **آخرین کاربران** ({shown + len(users)} از {total})\n\n"]
     
-    for i, user in enumerate(users, 1):
+    for i, user in enumerate(users, shown + 1):
         status = "✅" if user.is_active else "❌"
         vip = "👑" if user.is_vip else ""
         
-        message += f"{i}. {status} {vip} "
-        message += f"**{user.first_name or 'بدون نام'}**\n"
-        message += f"   🆔 {user.telegram_id}\n"
-        message += f"   📅 {user.join_date.strftime('%Y/%m/%d')}\n\n"
+        parts.append(
+            f"{i}. {status} {vip} "
+            f"**{user.first_name or 'بدون نام'}**\n"
+            f"   🆔 {user.telegram_id}\n"
+            f"   📅 {user.join_date.strftime('%Y/%m/%d')}\n\n"
+        )
+    
+    keyboard = None
+    if has_next:
+        last = users[-1]
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton(
+            "◀️ صفحه بعد",
+            callback_data=f"{USERS_AFTER_ROUTE}:{last.join_date.isoformat()}:{last.id}:{shown + len(users)}"
+        )]])
+    
+    return "".join(parts), keyboard
+
+def parse_users_cursor(cursor: str) -> Optional[Tuple[datetime, int, int]]:
+    """Decode the (join_date, id, users shown) cursor of a next-page button"""
+    try:
+        join_date, user_id, shown = cursor.rsplit(":", 2)
+        return datetime.fromisoformat(join_date), int(user_id), int(shown)
+    except ValueError:
+        return None
+
+@require_admin
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /broadcast <text> command"""
+    text = " ".join(context.args) if context.args else ""
+    if not text:
+        await update.message.reply_text("📣 استفاده: /broadcast متن پیام")
+        return
+    
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(_BROADCAST_RECIPIENTS_STMT)
+        user_ids = result.scalars().all()
+    
+    semaphore = context.bot_data["broadcast_semaphore"]
+    sends = [_send_broadcast(context.bot, semaphore, user_id, text) for user_id in user_ids]
+    
+    # Handle each delivery as it finishes instead of waiting on the slowest
+    sent = 0
+    blocked = []
+    for next_send in asyncio.as_completed(sends):
+        user_id, error = await next_send
+        if error is None:
+            sent += 1
+        elif isinstance(error, Forbidden):
+            blocked.append(user_id)
+    
+    # Users who blocked the bot are skipped by future broadcasts
+    if blocked:
+        async with AsyncSessionLocal() as session:
+            await session.execute(_DEACTIVATE_USERS_STMT, {"user_ids": blocked})
+            await session.commit()
+        stats_service.invalidate_cache()
+    
+    await update.message.reply_text(
+        f"📣 پیام برای {sent} از {len(user_ids)} کاربر ارسال شد."
+    )
+
+@require_admin
+async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /ban <telegram_id> command"""
+    user_id = _parse_user_id(context.args)
+    if user_id is None:
+        await update.message.reply_text("🚫 استفاده: /ban شناسه_کاربر")
+        return
     
-    await update.message.reply_text(message, parse_mode="Markdown")
+    found, changed, name = await ban_service.set_banned(user_id, True)
+    if not found:
+        await update.message.reply_text("❌ کاربر یافت نشد.")
+    elif not changed:
+        await update.message.reply_text("ℹ️ این کاربر قبلاً مسدود شده است.")
+    else:
+        await update.message.reply_text(f"🚫 کاربر {name or user_id} مسدود شد.")
+
+@require_admin
+async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /unban <telegram_id> command"""
+    user_id = _parse_user_id(context.args)
+    if user_id is None:
+        await update.message.reply_text("✅ استفاده: /unban شناسه_کاربر")
+        return
+    
+    found, changed, name = await ban_service.set_banned(user_id, False)
+    if not found:
+        await update.message.reply_text("❌ کاربر یافت نشد.")
+    elif not changed:
+        await update.message.reply_text("ℹ️ این کاربر مسدود نیست.")
+    else:
+        await update.message.reply_text(f"✅ مسدودیت کاربر {name or user_id} برداشته شد.")
+
+def _parse_user_id(args) -> Optional[int]:
+    """Read the telegram id argument of /ban and /unban"""
+    try:
+        return int(args[0])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+@require_admin
+async def addchannel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /addchannel @username [monthly_price] command"""
+    args = context.args or []
+    try:
+        username = args[0]
+        monthly_price = int(args[1]) if len(args) > 1 else 0
+    except (IndexError, ValueError):
+        await update.message.reply_text("📢 استفاده: /addchannel @username [قیمت ماهانه]")
+        return
+    
+    if not username.startswith("@"):
+        username = f"@{username}"
+    
+    # Single INSERT ... ON CONFLICT DO NOTHING; False means it already exists
+    if await channel_service.add_channel(username, monthly_price=monthly_price):
+        await update.message.reply_text(f"✅ کانال {username} اضافه شد.")
+    else:
+        await update.message.reply_text(f"ℹ️ کانال {username} قبلاً ثبت شده است.")
+
+async def _send_broadcast(bot, semaphore: asyncio.Semaphore, user_id: int,
+                          text: str) -> Tuple[int, Optional[TelegramError]]:
+    """Send one broadcast message within Telegram's global rate limit"""
+    async with semaphore:
+        try:
+            try:
+                await bot.send_message(user_id, text)
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                await bot.send_message(user_id, text)
+        except TelegramError as e:
+            logger.warning(f"Broadcast to {user_id} failed: {e}")
+            return user_id, e
+        finally:
+            # Each slot is held for at least a second, capping throughput at
+            # BROADCAST_RATE messages per second
+            await asyncio.sleep(1)
+        return user_id, None
@@ -3,53 +3,83 @@ Callback query handlers
 """
 
 import logging
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import Update
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import AsyncSessionLocal, User
+from src.core.database import AsyncSessionLocal, Channel
+from src.core.config import config
+from src.handlers.admin_handlers import (
+    get_admin_stats, render_users_page, parse_users_cursor, USERS_AFTER_ROUTE
+)
 from src.services.price_service import PriceService
-from src.services.news_service import NewsService
-from src.utils.keyboards import get_main_keyboard, get_price_keyboard, get_admin_keyboard
+from src.utils.keyboards import (
+    get_main_keyboard, get_price_keyboard, get_admin_keyboard, get_back_keyboard,
+    ADMIN_STATS_KEYBOARD
+)
 from src.utils.formatters import format_price, format_change
 
 logger = logging.getLogger(__name__)
-price_service = PriceService()
-news_service = NewsService()
+
+# MarkdownV2 message templates; the static text is already escaped, so only
+# the values filled in per call go through escape_markdown
+GOLD_HEADER = "🏅 *اطلاعات طلا*\n\n"
+GOLD_TEMPLATE = GOLD_HEADER + (
+    "• *طلای 18 عیار:* {gold_18k}\n"
+    "• *طلای 24 عیار:* {gold_24k}\n"
+    "• *انس جهانی:* {ounce}\n"
+)
+CURRENCY_HEADER = "💵 *نرخ ارز*\n\n"
+CURRENCY_TEMPLATE = CURRENCY_HEADER + (
+    "• *دلار:* {usd}\n"
+    "• *یورو:* {eur}\n"
+    "• *پوند:* {gbp}\n"
+)
+DATA_UNAVAILABLE = "⚠️ اطلاعات در دسترس نیست"
+
+MAIN_MENU_TEXT = (
+    "🎉 **به ربات MarketPulse Pro خوش آمدید!**\n\n"
+    "💎 **ویژگی‌های ربات:**\n"
+    "• قیمت لحظه‌ای طلا و ارز\n"
+    "• اخبار اقتصادی\n"
+    "• مدیریت کاربران\n\n"
+    "📊 برای شروع از دکمه‌های زیر استفاده کنید:"
+)
+PRICE_MENU_TEXT = "📊 **قیمت‌های لحظه‌ای**\n\nلطفاً یکی از گزینه‌ها را انتخاب کنید:"
+
+_ADMIN_CHANNELS_STMT = (
+    select(Channel.username, Channel.is_active)
+    .order_by(Channel.created_at.desc())
+)
+
+# Callback data is "<route>" or "<route>:<argument>"; each route maps to
+# a callable taking (query, context, argument)
+_CALLBACK_ROUTES = {
+    "menu_main": lambda query, context, arg: show_main_menu(query),
+    "menu_prices": lambda query, context, arg: show_price_menu(query),
+    "price_gold": lambda query, context, arg: show_gold_prices(query, context.bot_data["price_service"]),
+    "price_currency": lambda query, context, arg: show_currency_prices(query, context.bot_data["price_service"]),
+    "admin_stats": lambda query, context, arg: show_admin_stats(query),
+    "admin_stats_refresh": lambda query, context, arg: show_admin_stats(query, force=True),
+    "admin_channels": lambda query, context, arg: show_admin_channels(query),
+    USERS_AFTER_ROUTE: lambda query, context, arg: show_users_page(query, arg),
+}
 
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle all callback queries"""
     query = update.callback_query
     await query.answer()
     
-    data = query.data
-    
-    # Update user activity
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == query.from_user.id)
-        )
-        db_user = result.scalar_one_or_none()
-        
-        if db_user:
-            db_user.last_active = datetime.utcnow()
-            db_user.message_count += 1
-            await session.commit()
+    # Update user activity (written back in batches by the scheduler)
+    context.bot_data["activity_service"].record(query.from_user.id)
     
     # Route callbacks
-    if data == "menu_main":
-        await show_main_menu(query)
-    elif data == "menu_prices":
-        await show_price_menu(query)
-    elif data == "price_gold":
-        await show_gold_prices(query)
-    elif data == "price_currency":
-        await show_currency_prices(query)
-    elif data == "admin_stats":
-        await show_admin_stats(query)
-    elif data == "admin_channels":
-        await show_admin_channels(query)
+    route, _, arg = query.data.partition(":")
+    show = _CALLBACK_ROUTES.get(route)
+    if show is not None:
+        await show(query, context, arg)
     else:
         await query.edit_message_text(
             "⚠️ این دکمه دیگر فعال نیست.",
@@ -58,144 +88,122 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def show_main_menu(query):
     """Show main menu"""
-    welcome_text = (
-        "🎉 **به ربات MarketPulse Pro خوش آمدید!**\n\n"
-        "💎 **ویژگی‌های ربات:**\n"
-        "• قیمت لحظه‌ای طلا و ارز\n"
-        "• اخبار اقتصادی\n"
-        "• مدیریت کاربران\n\n"
-        "📊 برای شروع از دکمه‌های زیر استفاده کنید:"
-    )
-    
     await query.edit_message_text(
-        welcome_text,
+        MAIN_MENU_TEXT,
         parse_mode="Markdown",
         reply_markup=get_main_keyboard()
     )
 
 async def show_price_menu(query):
     """Show price menu"""
-    message = "📊 **قیمت‌های لحظه‌ای**\n\nلطفاً یکی از گزینه‌ها را انتخاب کنید:"
-    
     await query.edit_message_text(
-        message,
+        PRICE_MENU_TEXT,
         parse_mode="Markdown",
         reply_markup=get_price_keyboard()
     )
 
-async def show_gold_prices(query):
+def _escaped_price(value) -> str:
+    return escape_markdown(format_price(value), version=2)
+
+def render_gold(gold_data: dict) -> str:
+    """MarkdownV2 gold message"""
+    if not gold_data:
+        return GOLD_HEADER + DATA_UNAVAILABLE
+    return GOLD_TEMPLATE.format_map({
+        'gold_18k': _escaped_price(gold_data.get('gold_18k', 0)),
+        'gold_24k': _escaped_price(gold_data.get('gold_24k', 0)),
+        'ounce': escape_markdown(f"${gold_data.get('ounce', 0):,.2f}", version=2)
+    })
+
+def render_currency(currency_data: dict) -> str:
+    """MarkdownV2 currency message"""
+    if not currency_data:
+        return CURRENCY_HEADER + DATA_UNAVAILABLE
+    return CURRENCY_TEMPLATE.format_map({
+        'usd': _escaped_price(currency_data.get('usd', 0)),
+        'eur': _escaped_price(currency_data.get('eur', 0)),
+        'gbp': _escaped_price(currency_data.get('gbp', 0))
+    })
+
+async def show_gold_prices(query, price_service: PriceService):
     """Show gold prices"""
-    try:
-        gold_data = await price_service.get_gold_prices()
-        
-        message = "🏅 **اطلاعات طلا**\n\n"
-        
-        if gold_data:
-            message += f"• **طلای 18 عیار:** {format_price(gold_data.get('gold_18k', 0))}\n"
-            message += f"• **طلای 24 عیار:** {format_price(gold_data.get('gold_24k', 0))}\n"
-            message += f"• **انس جهانی:** ${gold_data.get('ounce', 0):,.2f}\n"
-        else:
-            message += "⚠️ اطلاعات در دسترس نیست"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_prices")]
-        ])
-        
-        await query.edit_message_text(
-            message,
-            parse_mode="Markdown",
-            reply_markup=keyboard
-        )
-        
-    except Exception as e:
-        logger.error(f"Error showing gold prices: {e}")
-        await query.edit_message_text(
-            "⚠️ خطا در دریافت اطلاعات طلا.",
-            reply_markup=get_price_keyboard()
-        )
+    await _show_prices(query, price_service.get_gold_prices, render_gold,
+                       "gold", "⚠️ خطا در دریافت اطلاعات طلا.")
 
-async def show_currency_prices(query):
+async def show_currency_prices(query, price_service: PriceService):
     """Show currency prices"""
+    await _show_prices(query, price_service.get_currency_prices, render_currency,
+                       "currency", "⚠️ خطا در دریافت اطلاعات ارز.")
+
+async def _show_prices(query, fetch, render, label: str, error_text: str):
+    """Fetch, render and show one price view with a back button"""
     try:
-        currency_data = await price_service.get_currency_prices()
-        
-        message = "💵 **نرخ ارز**\n\n"
-        
-        if currency_data:
-            message += f"• **دلار:** {format_price(currency_data.get('usd', 0))}\n"
-            message += f"• **یورو:** {format_price(currency_data.get('eur', 0))}\n"
-            message += f"• **پوند:** {format_price(currency_data.get('gbp', 0))}\n"
-        else:
-            message += "⚠️ اطلاعات در دسترس نیست"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_prices")]
-        ])
-        
+        message = render(await fetch())
         await query.edit_message_text(
             message,
-            parse_mode="Markdown",
-            reply_markup=keyboard
+            parse_mode="MarkdownV2",
+            reply_markup=get_back_keyboard("menu_prices")
         )
         
     except Exception as e:
-        logger.error(f"Error showing currency prices: {e}")
-        await query.edit_message_text(
-            "⚠️ خطا در دریافت اطلاعات ارز.",
-            reply_markup=get_price_keyboard()
-        )
+        logger.error(f"Error showing {label} prices: {e}")
+        await query.edit_message_text(error_text, reply_markup=get_price_keyboard())
 
-async def show_admin_stats(query):
+async def show_admin_stats(query, force: bool = False):
     """Show admin statistics"""
-    from datetime import datetime
+    if query.from_user.id not in config.ADMIN_IDS:
+        return
     
-    async with AsyncSessionLocal() as session:
-        total_users = await session.scalar(select(func.count(User.id)))
-        active_users = await session.scalar(
-            select(func.count(User.id)).where(User.is_active == True)
-        )
+    stats = await get_admin_stats(force=force)
     
     stats_text = (
         "📊 **آمار مدیر**\n\n"
-        f"👥 کاربران کل: {total_users or 0}\n"
-        f"✅ کاربران فعال: {active_users or 0}\n\n"
-        f"🕐 آخرین آپدیت: {datetime.now().strftime('%H:%M:%S')}"
+        f"👥 کاربران کل: {stats['total_users']}\n"
+        f"✅ کاربران فعال: {stats['active_users']}\n\n"
+        f"🕐 آخرین آپدیت: {stats['updated_time']}"
     )
     
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔄 بروزرسانی", callback_data="admin_stats")],
-        [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
-    ])
-    
     await query.edit_message_text(
         stats_text,
         parse_mode="Markdown",
+        reply_markup=ADMIN_STATS_KEYBOARD
+    )
+
+async def show_users_page(query, cursor: str):
+    """Show the next /users page"""
+    cursor = parse_users_cursor(cursor)
+    if query.from_user.id not in config.ADMIN_IDS or cursor is None:
+        return
+    
+    message, keyboard = await render_users_page(cursor)
+    await query.edit_message_text(
+        message,
+        parse_mode="Markdown",
         reply_markup=keyboard
     )
 
 async def show_admin_channels(query):
     """Show admin channels"""
+    if query.from_user.id not in config.ADMIN_IDS:
+        return
+    
     async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Channel).order_by(Channel.created_at.desc())
-        )
-        channels = result.scalars().all()
+        result = await session.execute(_ADMIN_CHANNELS_STMT)
+        channels = result.all()
     
     if not channels:
         message = "📭 هیچ کانالی ثبت نشده است."
+        parse_mode = None
     else:
-        message = "📢 **کانال‌های اجباری**\n\n"
-        for i, channel in enumerate(channels, 1):
-            status = "✅ فعال" if channel.is_active else "❌ غیرفعال"
-            message += f"{i}. **{channel.username}**\n"
-            message += f"   وضعیت: {status}\n\n"
-    
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
-    ])
+        parse_mode = "Markdown"
+        message = "📢 **کانال‌های اجباری**\n\n" + "".join(
+            f"{i}. **{channel.username}**\n"
+            f"   وضعیت: {'✅ فعال' if channel.is_active else '❌ غیرفعال'}\n\n"
+            for i, channel in enumerate(channels, 1)
+        )
     
     await query.edit_message_text(
         message,
-        parse_mode="Markdown",
-        reply_markup=keyboard
+        parse_mode=parse_mode,
+        reply_markup=get_back_keyboard("menu_main")
     )
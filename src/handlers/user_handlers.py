@@ -2,59 +2,74 @@ import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
-from sqlalchemy import select
+from telegram.helpers import escape_markdown
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import AsyncSessionLocal, User
-from src.services.price_service import PriceService
+from src.core.database import AsyncSessionLocal, User, dialect_insert
+from src.services.stats_service import stats_service
 from src.utils.decorators import require_subscription
-from src.utils.keyboards import get_main_keyboard
+from src.utils.keyboards import get_main_keyboard, get_price_keyboard
 from src.utils.formatters import format_price, format_change
 
 logger = logging.getLogger(__name__)
-price_service = PriceService()
+
+# Pre-escaped MarkdownV2 header for /prices
+PRICES_HEADER = "📊 *قیمت‌های لحظه‌ای*\n\n"
+
+WELCOME_TEXT = (
+    "🎉 **به ربات MarketPulse Pro خوش آمدید!**\n\n"
+    "💎 **ویژگی‌های ربات:**\n"
+    "• قیمت لحظه‌ای طلا و ارز\n"
+    "• قیمت ارزهای دیجیتال\n"
+    "• اخبار اقتصادی ایران و جهان\n\n"
+    "📊 برای شروع از دکمه‌های زیر استفاده کنید:"
+)
+HELP_TEXT = (
+    "📚 **راهنمای ربات MarketPulse Pro**\n\n"
+    "🔹 **دستورات اصلی:**\n"
+    "/start - راه‌اندازی ربات\n"
+    "/prices - قیمت‌های لحظه‌ای\n"
+    "/help - راهنمای ربات\n\n"
+    "🔹 **پشتیبانی:**\n"
+    "برای گزارش مشکل:\n"
+    "@MarketPulseSupport"
+)
+
+# Registers a new user or touches a returning one in a single statement.
+# New rows keep the default message_count of 0, which tells the two apart.
+_new_user = dialect_insert(User)
+_UPSERT_USER_STMT = _new_user.on_conflict_do_update(
+    index_elements=[User.telegram_id],
+    set_={
+        "last_active": _new_user.excluded.last_active,
+        "message_count": User.message_count + 1
+    }
+).returning(User.message_count)
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    chat_id = update.effective_chat.id
+    now = datetime.utcnow()
     
     logger.info(f"New user: {user.id} - {user.username}")
     
     async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.telegram_id == user.id)
-        )
-        db_user = result.scalar_one_or_none()
-        
-        if not db_user:
-            db_user = User(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                language_code=user.language_code,
-                join_date=datetime.utcnow(),
-                last_active=datetime.utcnow()
-            )
-            session.add(db_user)
-            await session.commit()
-            logger.info(f"Created new user: {user.id}")
-        else:
-            db_user.last_active = datetime.utcnow()
-            db_user.message_count += 1
-            await session.commit()
+        message_count = (await session.execute(_UPSERT_USER_STMT, {
+            "telegram_id": user.id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "language_code": user.language_code,
+            "join_date": now,
+            "last_active": now
+        })).scalar_one()
+        await session.commit()
     
-    welcome_text = (
-        "🎉 **به ربات MarketPulse Pro خوش آمدید!**\n\n"
-        "💎 **ویژگی‌های ربات:**\n"
-        "• قیمت لحظه‌ای طلا و ارز\n"
-        "• قیمت ارزهای دیجیتال\n"
-        "• اخبار اقتصادی ایران و جهان\n\n"
-        "📊 برای شروع از دکمه‌های زیر استفاده کنید:"
-    )
+    if message_count == 0:
+        stats_service.invalidate_cache()
+        logger.info(f"Created new user: {user.id}")
     
     await update.message.reply_text(
-        welcome_text,
+        WELCOME_TEXT,
         parse_mode="Markdown",
         reply_markup=get_main_keyboard()
     )
@@ -62,21 +77,25 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @require_subscription
 async def prices_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
+        price_service = context.bot_data["price_service"]
         prices = await price_service.get_all_prices()
         
-        message = "📊 **قیمت‌های لحظه‌ای**\n\n"
+        parts = [PRICES_HEADER]
         
         if "gold_18k" in prices:
-            message += f"🏅 **طلای 18 عیار:** {format_price(prices['gold_18k'])}\n"
+            parts.append(f"🏅 *طلای 18 عیار:* {escape_markdown(format_price(prices['gold_18k']), version=2)}\n")
         if "usd" in prices:
-            message += f"💵 **دلار:** {format_price(prices['usd'])}\n"
+            parts.append(f"💵 *دلار:* {escape_markdown(format_price(prices['usd']), version=2)}\n")
         
-        message += f"\n🕐 آخرین بروزرسانی: {datetime.now().strftime('%H:%M:%S')}"
+        # When the prices were actually fetched, not when they were shown
+        if price_service.updated_at is not None:
+            updated = datetime.fromtimestamp(price_service.updated_at).strftime('%H:%M:%S')
+            parts.append(f"\n🕐 آخرین بروزرسانی: {updated}")
+        message = "".join(parts)
         
-        from src.utils.keyboards import get_price_keyboard
         await update.message.reply_text(
             message,
-            parse_mode="Markdown",
+            parse_mode="MarkdownV2",
             reply_markup=get_price_keyboard()
         )
         
@@ -85,14 +104,4 @@ async def prices_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ خطا در دریافت قیمت‌ها.")
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    help_text = (
-        "📚 **راهنمای ربات MarketPulse Pro**\n\n"
-        "🔹 **دستورات اصلی:**\n"
-        "/start - راه‌اندازی ربات\n"
-        "/prices - قیمت‌های لحظه‌ای\n"
-        "/help - راهنمای ربات\n\n"
-        "🔹 **پشتیبانی:**\n"
-        "برای گزارش مشکل:\n"
-        "@MarketPulseSupport"
-    )
-    await update.message.reply_text(help_text, parse_mode="Markdown")
\ No newline at end of file
+    await update.message.reply_text(HELP_TEXT, parse_mode="Markdown")
\ No newline at end of file
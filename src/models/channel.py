@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Index, text
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -6,6 +6,15 @@ Base = declarative_base()
 
 class Channel(Base):
     __tablename__ = "channels"
+    __table_args__ = (
+        # Admin channel list is ordered newest-first
+        Index("ix_channels_created_at", "created_at"),
+        # Required channels: active ones, newest first
+        # SQLite only matches a partial index whose predicate has the same
+        # form as the query's, and SQLAlchemy renders == True as "= 1" there
+        Index("ix_channels_active_created", "created_at",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
     
     id = Column(Integer, primary_key=True)
     username = Column(String(100), unique=True, nullable=False)
@@ -13,7 +22,7 @@ class Channel(Base):
     monthly_price = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    admin_id = Column(Integer, nullable=True)
+    admin_id = Column(BigInteger, nullable=True)
     
     def __repr__(self):
         return f"<Channel {self.username}>"
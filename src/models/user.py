@@ -1,14 +1,20 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, JSON, Index, func, cast
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 
 Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of /users walks this index newest-first
+        Index("ix_users_join_date_id", "join_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(Integer, unique=True, nullable=False, index=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
     username = Column(String(100), nullable=True)
     first_name = Column(String(100))
     last_name = Column(String(100), nullable=True)
@@ -21,7 +27,7 @@ class User(Base):
     
     # Settings
     notifications_enabled = Column(Boolean, default=True)
-    favorite_symbols = Column(JSON, default=list)
+    favorite_symbols = Column(JSON().with_variant(ARRAY(String(20)), "postgresql"), default=list)
     
     # Stats
     join_date = Column(DateTime, default=datetime.utcnow)
@@ -36,5 +42,21 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_banned = Column(Boolean, default=False)
     
+    @hybrid_property
+    def full_name(self):
+        """Display name: first + last name, falling back to username or id"""
+        if self.first_name and self.last_name:
+            return f"{self.first_name} {self.last_name}"
+        return self.first_name or self.username or str(self.telegram_id)
+    
+    @full_name.expression
+    def full_name(cls):
+        return func.coalesce(
+            cls.first_name + " " + cls.last_name,
+            cls.first_name,
+            cls.username,
+            cast(cls.telegram_id, String)
+        )
+    
     def __repr__(self):
         return f"<User {self.telegram_id}>"
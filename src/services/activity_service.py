@@ -0,0 +1,57 @@
+"""
+Activity Service - Batched user activity tracking
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+from sqlalchemy import update, bindparam
+
+from src.core.database import AsyncSessionLocal, User
+
+logger = logging.getLogger(__name__)
+
+users_table = User.__table__
+
+# One parameterized UPDATE, executed once per flush with a row per user
+_FLUSH_STMT = (
+    update(users_table)
+    .where(users_table.c.telegram_id == bindparam("user_id"))
+    .values(
+        last_active=bindparam("last_seen"),
+        message_count=users_table.c.message_count + bindparam("hits")
+    )
+)
+
+
+class ActivityService:
+    """Collects user activity in memory and writes it back in batches"""
+    
+    def __init__(self):
+        # telegram_id -> (last seen epoch seconds, interactions since last flush)
+        self._pending: Dict[int, Tuple[float, int]] = {}
+    
+    def record(self, user_id: int):
+        """Mark a user as active; persisted on the next flush"""
+        hits = self._pending[user_id][1] if user_id in self._pending else 0
+        self._pending[user_id] = (time.time(), hits + 1)
+    
+    async def flush(self):
+        """Write all pending activity in a single executemany round-trip"""
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, {}
+        params = [
+            {"user_id": user_id, "last_seen": datetime.utcfromtimestamp(last_seen), "hits": hits}
+            for user_id, (last_seen, hits) in pending.items()
+        ]
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(_FLUSH_STMT, params)
+                await session.commit()
+                
+        except Exception as e:
+            logger.error(f"Error flushing user activity: {e}")
@@ -0,0 +1,71 @@
+"""
+Ban Service - Keep banned users out
+"""
+
+import logging
+from typing import Optional, Set, Tuple
+from sqlalchemy import select, exists, bindparam, update
+
+from src.core.database import AsyncSessionLocal, User
+from src.services.stats_service import stats_service
+
+logger = logging.getLogger(__name__)
+
+# Telegram ids of banned users: loaded once at startup, then kept in step
+# by set_banned so checking an update never needs a query
+_banned_ids: Set[int] = set()
+
+_BANNED_IDS_STMT = select(User.telegram_id).where(User.is_banned == True)
+# Keyed by the new is_banned value; only rows not already in that state match.
+# is_active is left alone: it records whether the user blocked the bot.
+_SET_BANNED_STMTS = {
+    banned: update(User)
+    .where(User.telegram_id == bindparam("user_id"), User.is_banned == (not banned))
+    .values(is_banned=banned)
+    .returning(User.first_name)
+    for banned in (True, False)
+}
+
+
+class BanService:
+    """Service for banning and unbanning users"""
+    
+    async def load(self):
+        """Read the banned ids; call once before updates are handled"""
+        async with AsyncSessionLocal() as session:
+            banned = set((await session.execute(_BANNED_IDS_STMT)).scalars())
+        
+        _banned_ids.clear()
+        _banned_ids.update(banned)
+        logger.info(f"Loaded {len(banned)} banned users")
+    
+    def is_banned(self, user_id: int) -> bool:
+        """Whether updates from this user should be ignored"""
+        return user_id in _banned_ids
+    
+    async def set_banned(self, user_id: int, banned: bool) -> Tuple[bool, bool, Optional[str]]:
+        """Flip a user's ban flag in one UPDATE ... RETURNING; (found, changed, name)"""
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(_SET_BANNED_STMTS[banned], {"user_id": user_id})).first()
+            
+            if row is None:
+                # Nothing updated: tell "no such user" apart from "already in that state"
+                found = await session.scalar(select(exists().where(User.telegram_id == user_id)))
+            else:
+                found = True
+                await session.commit()
+        
+        if found:
+            if banned:
+                _banned_ids.add(user_id)
+            else:
+                _banned_ids.discard(user_id)
+        if row is None:
+            return found, False, None
+        
+        stats_service.invalidate_cache()
+        return True, True, row.first_name
+
+
+# Shared instance used by the bot and the admin handlers
+ban_service = BanService()
@@ -2,60 +2,130 @@
 Channel Service - Manage required channels
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional
-from sqlalchemy import select
+from cachetools import TTLCache
+from sqlalchemy import select, exists, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import AsyncSessionLocal, Channel, User
+from src.core.database import AsyncSessionLocal, Channel, User, dialect_insert
 from src.core.config import config
+from src.services.stats_service import stats_service
 
 logger = logging.getLogger(__name__)
 
+# Shared by every ChannelService instance so invalidation reaches them all
+_required_channels_cache = TTLCache(maxsize=1, ttl=300)
+_required_channels_lock = asyncio.Lock()
+_membership_cache = TTLCache(maxsize=10000, ttl=600)
+
 
 class ChannelService:
     """Service for managing required channels"""
     
     async def get_required_channels(self) -> List[Channel]:
         """Get list of required channels"""
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(Channel)
-                .where(Channel.is_active == True)
-                .order_by(Channel.created_at.desc())
-            )
-            channels = result.scalars().all()
+        channels = _required_channels_cache.get("required")
+        if channels is not None:
+            return channels
+        
+        async with _required_channels_lock:
+            # Another caller may have refreshed it while we waited
+            channels = _required_channels_cache.get("required")
+            if channels is not None:
+                return channels
             
-            # Limit to required count
-            return channels[:config.REQUIRED_CHANNELS_COUNT]
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(Channel)
+                    .where(Channel.is_active == True)
+                    .order_by(Channel.created_at.desc())
+                    # Limit to required count; the scan stops there
+                    .limit(config.REQUIRED_CHANNELS_COUNT)
+                )
+                channels = result.scalars().all()
+            
+            _required_channels_cache["required"] = channels
+            return channels
     
     async def check_user_channels(self, user_id: int) -> bool:
         """Check if user has joined required channels"""
+        if user_id in _membership_cache:
+            return True
+        
+        try:
+            joined = await self._check_user_channels(user_id)
+        except Exception as e:
+            logger.error(f"Error checking user channels: {e}")
+            return False
+        
+        if joined:
+            # Only verified users are cached; failures are re-checked each time
+            _membership_cache[user_id] = True
+        return joined
+    
+    async def _check_user_channels(self, user_id: int) -> bool:
+        """Uncached membership check"""
+        # Get required channels
+        required_channels = await self.get_required_channels()
+        
+        if not required_channels:
+            # No channels required
+            return True
+        
+        async with AsyncSessionLocal() as session:
+            # Only whether the user is registered matters here
+            user_exists = await session.scalar(
+                select(exists().where(User.telegram_id == user_id))
+            )
+        
+        if not user_exists:
+            return False
+        
+        # For now, skip actual channel checking (simplified)
+        # In production, you would verify with Telegram API
+        return True
+    
+    def invalidate_cache(self, user_id: Optional[int] = None):
+        """Forget cached channel data for one user, or everything"""
+        if user_id is None:
+            _required_channels_cache.clear()
+            _membership_cache.clear()
+        else:
+            _membership_cache.pop(user_id, None)
+    
+    async def add_channel(self, username: str, title: Optional[str] = None,
+                          monthly_price: int = 0) -> bool:
+        """Add a required channel; returns False if it already exists"""
+        stmt = (
+            dialect_insert(Channel)
+            .values(
+                username=username,
+                title=title,
+                monthly_price=monthly_price,
+                is_active=True,
+                created_at=datetime.utcnow()
+            )
+            .on_conflict_do_nothing(index_elements=["username"])
+            .returning(Channel.id)
+        )
+        
         try:
-            # Get required channels
-            required_channels = await self.get_required_channels()
-            
-            if not required_channels:
-                # No channels required
-                return True
-            
             async with AsyncSessionLocal() as session:
-                # Get user
-                result = await session.execute(
-                    select(User).where(User.telegram_id == user_id)
-                )
-                user = result.scalar_one_or_none()
-                
-                if not user:
-                    return False
-                
-                # For now, skip actual channel checking (simplified)
-                # In production, you would verify with Telegram API
-                return True
+                result = await session.execute(stmt)
+                channel_id = result.scalar_one_or_none()
+                await session.commit()
+            
+            if channel_id is not None:
+                # A new required channel changes every user's membership
+                self.invalidate_cache()
+                stats_service.invalidate_cache()
+            return channel_id is not None
                 
         except Exception as e:
-            logger.error(f"Error checking user channels: {e}")
+            logger.error(f"Error adding channel: {e}")
             return False
     
     async def add_user_channel(self, user_id: int, channel_username: str) -> bool:
@@ -80,8 +150,9 @@ class ChannelService:
                 
                 user.joined_channels = joined_channels
                 await session.commit()
-                
-                return True
+            
+            self.invalidate_cache(user_id)
+            return True
                 
         except Exception as e:
             logger.error(f"Error adding user channel: {e}")
@@ -90,19 +161,25 @@ class ChannelService:
     async def get_channel_stats(self) -> Dict:
         """Get channel statistics"""
         async with AsyncSessionLocal() as session:
-            # Count total channels
-            total_result = await session.execute(select(Channel))
-            total_channels = len(total_result.scalars().all())
-            
-            # Count active channels
-            active_result = await session.execute(
-                select(Channel).where(Channel.is_active == True)
+            # Counted and summed in the database, in one round-trip
+            result = await session.execute(
+                select(
+                    func.count(Channel.id),
+                    func.count(Channel.id).filter(Channel.is_active == True),
+                    func.coalesce(
+                        func.sum(Channel.monthly_price).filter(Channel.is_active == True), 0
+                    )
+                )
             )
-            active_channels = len(active_result.scalars().all())
-            
-            return {
-                'total_channels': total_channels,
-                'active_channels': active_channels,
-                'total_monthly_price': 0,
-                'average_monthly_price': 0
-            }
+            total_channels, active_channels, total_monthly_price = result.one()
+        
+        return {
+            'total_channels': total_channels,
+            'active_channels': active_channels,
+            'total_monthly_price': total_monthly_price,
+            'average_monthly_price': total_monthly_price / active_channels if active_channels else 0
+        }
+
+
+# Shared instance used by the handlers
+channel_service = ChannelService()
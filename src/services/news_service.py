@@ -7,13 +7,38 @@ import feedparser
 import asyncio
 import logging
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
 class NewsService:
     """Service for fetching and managing news"""
     
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=20,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=60
+                        ),
+                        timeout=aiohttp.ClientTimeout(total=10),
+                        headers={"User-Agent": "MarketPulsePro/1.0"}
+                    )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+    
     async def get_latest_news(self, limit: int = 3) -> List[Dict]:
         """Get latest news from RSS feeds"""
         try:
@@ -22,14 +47,18 @@ class NewsService:
                 "https://www.farsnews.ir/rss/economy"
             ]
             
+            # Fetch all feeds concurrently
+            results = await asyncio.gather(
+                *(self._fetch_feed(feed_url) for feed_url in rss_feeds),
+                return_exceptions=True
+            )
+            
             all_news = []
-            for feed_url in rss_feeds:
-                try:
-                    news_items = await self._fetch_feed(feed_url)
-                    all_news.extend(news_items[:2])  # Take 2 from each
-                except Exception as e:
-                    logger.error(f"Error fetching {feed_url}: {e}")
+            for feed_url, news_items in zip(rss_feeds, results):
+                if isinstance(news_items, Exception):
+                    logger.error(f"Error fetching {feed_url}: {news_items}")
                     continue
+                all_news.extend(news_items[:2])  # Take 2 from each
             
             # Sort by date and limit
             all_news.sort(key=lambda x: x.get('published', datetime.min), reverse=True)
@@ -42,39 +71,43 @@ class NewsService:
     async def _fetch_feed(self, feed_url: str) -> List[Dict]:
         """Fetch and parse a single RSS feed"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(feed_url, timeout=10) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        feed = feedparser.parse(content)
-                        
-                        news_items = []
-                        for entry in feed.entries[:5]:
-                            try:
-                                # Get date
-                                published = entry.get('published_parsed')
-                                if published:
-                                    published_dt = datetime(*published[:6])
-                                else:
-                                    published_dt = datetime.now()
-                                
-                                # Clean title
-                                title = entry.title[:100] + "..." if len(entry.title) > 100 else entry.title
-                                
-                                news_item = {
-                                    'title': title,
-                                    'link': entry.get('link', ''),
-                                    'source': feed.feed.get('title', 'منبع'),
-                                    'published': published_dt
-                                }
-                                news_items.append(news_item)
-                                
-                            except Exception as e:
-                                continue
-                        
-                        return news_items
-                    return []
-                        
+            session = await self._get_session()
+            async with session.get(feed_url, timeout=10) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    # CPU-bound XML parsing; keep it off the event loop
+                    feed = await asyncio.to_thread(feedparser.parse, content)
+                    
+                    source = feed.feed.get('title', 'منبع')
+                    news_items = []
+                    for entry in feed.entries[:5]:
+                        try:
+                            # Get date
+                            published = entry.get('published_parsed')
+                            if published:
+                                published_dt = datetime(*published[:6])
+                            else:
+                                published_dt = datetime.now()
+                            
+                            # Clean title
+                            title = entry.title
+                            if len(title) > 100:
+                                title = title[:100] + "..."
+                            
+                            news_item = {
+                                'title': title,
+                                'link': entry.get('link', ''),
+                                'source': source,
+                                'published': published_dt
+                            }
+                            news_items.append(news_item)
+                            
+                        except Exception as e:
+                            continue
+                    
+                    return news_items
+                return []
+                    
         except Exception as e:
             logger.error(f"Error fetching feed {feed_url}: {e}")
             return []
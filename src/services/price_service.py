@@ -1,21 +1,123 @@
 import aiohttp
 import asyncio
 import logging
-from datetime import datetime
+import orjson
+import time
+from typing import Any, Dict, Optional, Tuple
 from cachetools import TTLCache
 
+from src.core.config import config
+
 logger = logging.getLogger(__name__)
 
+# (our field name, TGJU key) pairs read from sana.json
+GOLD_KEYS = (
+    ('gold_18k', 'price_gram_18k'),
+    ('gold_24k', 'price_gram_24k'),
+    ('coin_emami', 'coin_emami'),
+    ('ounce', 'price_ounce')
+)
+CURRENCY_KEYS = (
+    ('usd', 'price_dollar_rl'),
+    ('eur', 'price_eur'),
+    ('gbp', 'price_gbp')
+)
+
+
+def _parse_price(entry) -> float:
+    """Read the 'p' field of a TGJU entry, e.g. {"p": "1,234,500"}"""
+    try:
+        return float(str(entry['p']).replace(',', ''))
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def _extract_prices(data: dict, keys) -> dict:
+    """Project the requested TGJU entries in a single pass"""
+    return {key: _parse_price(data.get(tgju_key)) for key, tgju_key in keys}
+
 class PriceService:
     def __init__(self):
-        self.cache = TTLCache(maxsize=100, ttl=30)
+        # Upstream JSON payloads keyed by (url, params)
+        self.cache = TTLCache(maxsize=64, ttl=30)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        # In-progress downloads, so concurrent misses share one request
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # Last payload per key with its (ETag, Last-Modified) for revalidation
+        self._validated: Dict[tuple, Tuple[Optional[str], Optional[str], Any]] = {}
+        # Wall-clock time of the last successful upstream fetch
+        self.updated_at: Optional[float] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=32,
+                            limit_per_host=8,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=75,
+                            enable_cleanup_closed=True
+                        ),
+                        timeout=aiohttp.ClientTimeout(total=10),
+                        headers={"Accept-Encoding": "gzip, deflate"},
+                        json_serialize=lambda value: orjson.dumps(value).decode()
+                    )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+    
+    async def _fetch_json(self, url: str, params: Optional[dict] = None):
+        """GET a JSON endpoint, serving repeat requests from the cache"""
+        cache_key = (url, tuple(sorted(params.items())) if params else ())
+        data = self.cache.get(cache_key)
+        if data is not None:
+            return data
+        
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._download_json(cache_key, url, params))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # Shielded so one caller being cancelled doesn't cancel the others
+        return await asyncio.shield(task)
+    
+    async def _download_json(self, cache_key: tuple, url: str, params: Optional[dict]):
+        headers = {}
+        previous = self._validated.get(cache_key)
+        if previous:
+            etag, last_modified, _ = previous
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        
+        session = await self._get_session()
+        async with session.get(url, params=params, headers=headers) as response:
+            if response.status == 304 and previous:
+                # Unchanged upstream; reuse the payload we already have
+                data = previous[2]
+            elif response.status == 200:
+                data = orjson.loads(await response.read())
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self._validated[cache_key] = (etag, last_modified, data)
+            else:
+                return None
+        
+        self.cache[cache_key] = data
+        self.updated_at = time.time()
+        return data
     
     async def get_all_prices(self):
         try:
-            cache_key = "all_prices"
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-            
             gold_task = self.get_gold_prices()
             currency_task = self.get_currency_prices()
             
@@ -29,7 +131,6 @@ class PriceService:
             if not isinstance(currency_data, Exception):
                 prices.update(currency_data)
             
-            self.cache[cache_key] = prices
             return prices
             
         except Exception as e:
@@ -38,29 +139,9 @@ class PriceService:
     
     async def get_gold_prices(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "https://api.tgju.org/v1/data/sana.json",
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        gold_prices = {}
-                        for key, value in data.items():
-                            if isinstance(value, dict) and 'p' in value:
-                                try:
-                                    gold_prices[key] = float(value['p'])
-                                except:
-                                    pass
-                        
-                        result = {
-                            'gold_18k': gold_prices.get('price_gram_18k', 0),
-                            'gold_24k': gold_prices.get('price_gram_24k', 0),
-                            'coin_emami': gold_prices.get('coin_emami', 0),
-                            'ounce': gold_prices.get('price_ounce', 0),
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        return result
+            data = await self._fetch_json(config.TGJU_API_URL)
+            if data:
+                return _extract_prices(data, GOLD_KEYS)
             return {}
         except Exception as e:
             logger.error(f"Error fetching gold prices: {e}")
@@ -68,27 +149,9 @@ class PriceService:
     
     async def get_currency_prices(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "https://api.tgju.org/v1/data/sana.json",
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        currencies = {}
-                        currency_mapping = {
-                            'usd': 'price_dollar_rl',
-                            'eur': 'price_eur',
-                            'gbp': 'price_gbp'
-                        }
-                        for key, tgju_key in currency_mapping.items():
-                            if tgju_key in data and 'p' in data[tgju_key]:
-                                try:
-                                    currencies[key] = float(data[tgju_key]['p'])
-                                except:
-                                    currencies[key] = 0
-                        currencies['timestamp'] = datetime.now().isoformat()
-                        return currencies
+            data = await self._fetch_json(config.TGJU_API_URL)
+            if data:
+                return _extract_prices(data, CURRENCY_KEYS)
             return {}
         except Exception as e:
             logger.error(f"Error fetching currency prices: {e}")
@@ -6,6 +6,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+ACTIVITY_FLUSH_INTERVAL = 30  # seconds
+
 class SchedulerService:
     """Simple scheduler service"""
     
@@ -16,8 +18,20 @@ class SchedulerService:
         
     async def start(self):
         """Start the scheduler"""
+        self.app.job_queue.run_repeating(
+            self._flush_activity,
+            interval=ACTIVITY_FLUSH_INTERVAL,
+            first=ACTIVITY_FLUSH_INTERVAL
+        )
         self.logger.info("Scheduler started (simplified version)")
         
     async def stop(self):
         """Stop the scheduler"""
+        activity_service = self.app.bot_data.get("activity_service")
+        if activity_service:
+            await activity_service.flush()
         self.logger.info("Scheduler stopped")
+    
+    async def _flush_activity(self, context):
+        """Persist user activity collected since the last run"""
+        await context.bot_data["activity_service"].flush()
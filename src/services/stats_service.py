@@ -0,0 +1,66 @@
+"""
+Stats Service - Cached counts for the admin views
+"""
+
+import asyncio
+from datetime import datetime
+from cachetools import TTLCache
+from sqlalchemy import select, func, bindparam
+
+from src.core.database import AsyncSessionLocal, User, Channel
+
+_stats_cache = TTLCache(maxsize=1, ttl=30)
+_stats_lock = asyncio.Lock()
+
+# Built once at import; the start of today goes in as a bound parameter
+_ADMIN_STATS_STMT = select(
+    func.count(User.id),
+    func.count(User.id).filter(User.is_active == True),
+    func.count(User.id).filter(User.is_vip == True),
+    func.count(User.id).filter(User.is_banned == True),
+    func.count(User.id).filter(User.join_date >= bindparam("today_start")),
+    select(func.count(Channel.id)).scalar_subquery()
+)
+
+
+class StatsService:
+    """User and channel counts shown to admins"""
+    
+    async def get_stats(self, force: bool = False) -> dict:
+        """Counts for the admin views, reused for a short while unless forced"""
+        if not force and "stats" in _stats_cache:
+            return _stats_cache["stats"]
+        
+        async with _stats_lock:
+            # Another admin may have refreshed it while we waited
+            if not force and "stats" in _stats_cache:
+                return _stats_cache["stats"]
+            
+            stats = await self._fetch_stats()
+            _stats_cache["stats"] = stats
+            return stats
+    
+    async def _fetch_stats(self) -> dict:
+        """Query all admin counts in a single round-trip"""
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(_ADMIN_STATS_STMT, {"today_start": today_start})
+            total_users, active_users, vip_users, banned_users, new_users, channel_count = result.one()
+        
+        return {
+            'total_users': total_users or 0,
+            'active_users': active_users or 0,
+            'vip_users': vip_users or 0,
+            'banned_users': banned_users or 0,
+            'new_users': new_users or 0,
+            'channel_count': channel_count or 0
+        }
+    
+    def invalidate_cache(self):
+        """Drop the cached counts; called right after every write that changes them"""
+        _stats_cache.clear()
+
+
+# Shared instance used by the handlers and services that write users/channels
+stats_service = StatsService()
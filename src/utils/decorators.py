@@ -9,10 +9,8 @@ from telegram.ext import ContextTypes
 from typing import Callable
 
 from src.core.config import config
-from src.services.channel_service import ChannelService
 
 logger = logging.getLogger(__name__)
-channel_service = ChannelService()
 
 
 def require_subscription(func: Callable) -> Callable:
@@ -3,7 +3,10 @@ Text formatting utilities
 """
 
 from datetime import datetime
+from functools import lru_cache
 
+# Quotes repeat between refreshes, so the same values are formatted again and again
+@lru_cache(maxsize=4096)
 def format_price(price):
     """Format price with Persian formatting"""
     if not price:
@@ -13,6 +16,7 @@ def format_price(price):
     except:
         return "نامشخص"
 
+@lru_cache(maxsize=4096)
 def format_change(change):
     """Format percentage change"""
     if not change:
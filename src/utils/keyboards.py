@@ -2,36 +2,53 @@
 Keyboard utilities
 """
 
+from functools import lru_cache
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 
+# Keyboards never change, so each is built once and shared by every message
+MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📊 قیمت‌ها", callback_data="menu_prices"),
+        InlineKeyboardButton("📰 اخبار", callback_data="menu_news")
+    ],
+    [
+        InlineKeyboardButton("👤 پروفایل", callback_data="menu_profile"),
+        InlineKeyboardButton("⚙️ تنظیمات", callback_data="menu_settings")
+    ]
+])
+
+PRICE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🏅 طلا و سکه", callback_data="price_gold")],
+    [InlineKeyboardButton("💵 ارز", callback_data="price_currency")],
+    [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
+])
+
+ADMIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 آمار", callback_data="admin_stats")],
+    [InlineKeyboardButton("📢 کانال‌ها", callback_data="admin_channels")],
+    [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
+])
+
+ADMIN_STATS_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 بروزرسانی", callback_data="admin_stats_refresh")],
+    [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
+])
+
 def get_main_keyboard():
     """Get main menu keyboard"""
-    keyboard = [
-        [
-            InlineKeyboardButton("📊 قیمت‌ها", callback_data="menu_prices"),
-            InlineKeyboardButton("📰 اخبار", callback_data="menu_news")
-        ],
-        [
-            InlineKeyboardButton("👤 پروفایل", callback_data="menu_profile"),
-            InlineKeyboardButton("⚙️ تنظیمات", callback_data="menu_settings")
-        ]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return MAIN_KEYBOARD
 
 def get_price_keyboard():
     """Get price menu keyboard"""
-    keyboard = [
-        [InlineKeyboardButton("🏅 طلا و سکه", callback_data="price_gold")],
-        [InlineKeyboardButton("💵 ارز", callback_data="price_currency")],
-        [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return PRICE_KEYBOARD
 
 def get_admin_keyboard():
     """Get admin panel keyboard"""
-    keyboard = [
-        [InlineKeyboardButton("📊 آمار", callback_data="admin_stats")],
-        [InlineKeyboardButton("📢 کانال‌ها", callback_data="admin_channels")],
-        [InlineKeyboardButton("🔙 بازگشت", callback_data="menu_main")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return ADMIN_KEYBOARD
+
+@lru_cache(maxsize=None)
+def get_back_keyboard(callback_data: str):
+    """Get a single back button leading to the given menu"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔙 بازگشت", callback_data=callback_data)]
+    ])